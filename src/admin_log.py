@@ -1,8 +1,10 @@
 
 import storage as st
-import config
+import slack_send as ss
 from slack_sdk import WebClient
 import logging
+import queue
+from threading import Thread
 
 
 class AdminLogHandler(logging.Handler):
@@ -11,15 +13,31 @@ class AdminLogHandler(logging.Handler):
 
     def __init__(self) -> None:
         super().__init__()
-        self.wc = WebClient(token=config.get_slack_bot_token())
+        self.wc = ss.get_client()
+        # Posting to slack takes a few hundred ms per admin; do it off-thread so
+        # log calls don't block the caller
+        self._queue: queue.Queue[tuple[str, str]] = queue.Queue(maxsize=1000)
+        self._worker = Thread(target=self._send_loop, daemon=True)
+        self._worker.start()
 
-    def emit(self, record: logging.LogRecord) -> None:
-        ut = st.get_user_table()
-        admins = tuple(u for u in ut if st.UserRole.ADMIN in u.roles)
-        for a in admins:
+    def get_admins(self) -> tuple[st.User, ...]:
+        return st.get_user_table().users_with_role(st.UserRole.ADMIN)
+
+    def _send_loop(self) -> None:
+        while True:
+            slack_id, text = self._queue.get()
             try:
-                self.wc.chat_postMessage(channel=a.id, text=self.format(record))
+                self.wc.chat_postMessage(channel=slack_id, text=text)
             except Exception:
                 print("failed to log to slack.")
                 # nothing we can do
                 pass
+
+    def emit(self, record: logging.LogRecord) -> None:
+        text = self.format(record)
+        for a in self.get_admins():
+            try:
+                self._queue.put_nowait((a.id, text))
+            except queue.Full:
+                # drop rather than block the logging call
+                pass
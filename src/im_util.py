@@ -6,22 +6,14 @@ from typing import Callable
 
 
 def handle_command(command_text: str, say: Say) -> None:
-    command_map: dict[str, Callable[[list[str]], str]] = {
-        'testmode': cmd_testmode,
-        'user': cmd_user,
-        'msg': cmd_msg,
-    }
-
-    help_text = "Available commands: {}".format(", ".join(command_map.keys()))
-
     # future: maybe only extract first word to preserve whitespace for commands to deal with
     cmds = command_text.split()
 
     try:
-        ret = command_map[cmds[0].lower()](cmds[1:])
+        ret = _COMMAND_MAP[cmds[0].lower()](cmds[1:])
         say(ret)
     except KeyError:
-        say(help_text)
+        say(_HELP_TEXT)
 
 
 def cmd_testmode(args: list[str]) -> str:
@@ -56,7 +48,7 @@ def cmd_user(args: list[str]) -> str:
             ret += f"{i}: {u.name} {u.roles}\n"
         return ret
     elif arg == "update":
-        get_user_table().update_from_slack()
+        get_user_table().update_from_slack(force=True)
         return "User list updated"
     else:
         return help_text
@@ -97,3 +89,13 @@ def cmd_msg(args: list[str]) -> str:
     message = " ".join(args[1:])
     ret = ss.msg_user(slack_id, message)
     return "Message sent" if ret else "Message not sent"
+
+
+# Built once at import; handle_command just does a dict lookup
+_COMMAND_MAP: dict[str, Callable[[list[str]], str]] = {
+    'testmode': cmd_testmode,
+    'user': cmd_user,
+    'msg': cmd_msg,
+}
+
+_HELP_TEXT = "Available commands: {}".format(", ".join(_COMMAND_MAP.keys()))
@@ -18,9 +18,9 @@ def remind_kitchen_cleaner(assignment: st.KitchenAssignment) -> None:
     ut = st.get_user_table()
     assignee = ut[assignment.id]
     if assignee is None:
-        logger.error(f"No user corresponding to kitchen cleaning assignment: {assignment}")
+        logger.error("No user corresponding to kitchen cleaning assignment: %s", assignment)
         return
-    logger.info(f"Reminding {assignee.name} to clean the kitchen today")
+    logger.info("Reminding %s to clean the kitchen today", assignee.name)
     disp_name = ss.get_user_display_name(assignee.id)
     ss.msg_user(assignee.id, f"Hello {disp_name}! Today is your day to clean the kitchen.",
                 ignore_test_mode=True)
@@ -28,25 +28,32 @@ def remind_kitchen_cleaner(assignment: st.KitchenAssignment) -> None:
 
 def remind_choredoers() -> None:
     ut = st.get_user_table()
-    choredoers = (u for u in ut if st.UserRole.CHOREDOER in u.roles)
+    choredoers = ut.users_with_role(st.UserRole.CHOREDOER)
+
+    # Managers only do their chore on the last chore day of the month
+    today = datetime.date.today()
+    next_week = today + datetime.timedelta(7)
+    skip_managers = today.month == next_week.month
+
+    reminders: list[tuple[str, str]] = []
     for u in choredoers:
-        # if it is a manager and not the last day of the month, continue
-        today = datetime.date.today()
-        next_week = today + datetime.timedelta(7)
-        if st.UserRole.MANAGER in u.roles and today.month == next_week.month:
+        if skip_managers and st.UserRole.MANAGER in u.roles:
             continue
 
-        logger.info(f"Reminding {u.name} to do their chore")
+        logger.info("Reminding %s to do their chore", u.name)
         disp_name = ss.get_user_display_name(u.id)
-        msg = f"Hello {disp_name}! This is a reminder to complete your chore by 10 PM today."
-        try:
-            ss.msg_user(u.id, msg, ignore_test_mode=True)
-        except Exception as e:
-            logger.error(f"Failed to remind {u.name} to do their chore!")
-            logger.error(e)
+        reminders.append(
+            (u.id, f"Hello {disp_name}! This is a reminder to complete your chore by 10 PM today.")
+        )
+
+    # Fan the sends out concurrently instead of blocking on each one
+    ss.msg_users_bulk(reminders, ignore_test_mode=True)
 
 
 def run_reminders() -> None:
+    # One users.list call instead of a users.info call per reminded user
+    ss.prefetch_user_display_names()
+
     today = datetime.datetime.today()
     day_of_month = today.day
 
@@ -66,13 +73,17 @@ def run_reminders() -> None:
 
 def reminder_thread() -> None:
     # Set up reminders
-    logger.info(f"Current time is: {datetime.datetime.today()}")
+    logger.info("Current time is: %s", datetime.datetime.today())
     schedule.every().day.at(REMINDER_TIME).do(run_reminders)
-    logger.info(f"Running reminders every day at {REMINDER_TIME}")
+    logger.info("Running reminders every day at %s", REMINDER_TIME)
 
     while True:
         schedule.run_pending()
-        time.sleep(1)
+        # Sleep until the next scheduled run instead of polling every second
+        delay = schedule.idle_seconds()
+        if delay is None:
+            delay = 60
+        time.sleep(max(1, delay))
 
 
 if __name__ == "__main__":
@@ -1,34 +1,54 @@
 import config
 from vision import PhotoProcessor
 import storage as st
+import slack_send as ss
 from im_util import handle_command
 from slack_bolt import App
 from slack_bolt.context.say.say import Say
 from slack_sdk import WebClient
 from slack_sdk.errors import SlackApiError
-from typing import Dict, Any, cast
+from typing import Dict, Any
+from concurrent.futures import ThreadPoolExecutor
 import requests
 import logging
 
 _logger = logging.getLogger(__name__)
 
+# Shared session so image downloads reuse the TLS connection to files.slack.com
+# instead of a fresh handshake per picture
+_session = requests.Session()
+_session.mount('https://', requests.adapters.HTTPAdapter(pool_connections=10, pool_maxsize=20))
+
+# The home view is static; build it once instead of per app_home_opened event
+_HOME_VIEW: Dict[str, Any] = {
+    "type": "home",
+    "callback_id": "home_view",
+    "blocks": [
+        {
+            "type": "section",
+            "text": {
+                "type": "mrkdwn",
+                "text": "This is a test again :smile: :smile:"
+            }
+        }
+    ]
+}
+
 
 def handle_message(message: Dict[str, Any], say: Say, client: WebClient) -> None:
     # _logger.info(f"Received message:\n{pprint.pformat(message)}")
-    ch_type: str = message["channel_type"]
-    if ch_type == "im":
-        handle_im(message, say, client)
+    handler = _CH_HANDLERS.get(message["channel_type"])
+    if handler is not None:
+        handler(message, say, client)
 
 
 def handle_im(message: Dict[str, Any], say: Say, client: WebClient) -> None:
-    print("Received IM")
-    # Try and handle file
-    try:
-        file = message['files'][0]
-    except KeyError:
-        pass
-    else:
-        handle_im_file(file, say, client)
+    _logger.debug("Received IM")
+    # Try and handle file. Most DMs have none, so don't pay for a raised
+    # KeyError on the common path.
+    files = message.get('files')
+    if files:
+        handle_im_file(files[0], say, client)
         return
 
     # No file, is admin?
@@ -42,8 +62,14 @@ def handle_im(message: Dict[str, Any], say: Say, client: WebClient) -> None:
         say("Hello!!")
 
 
+# Dispatch by channel type with a single dict lookup
+_CH_HANDLERS = {
+    "im": handle_im,
+}
+
+
 def handle_im_file(file: Dict[str, Any], say: Say, client: WebClient) -> None:
-    print("Received file")
+    _logger.debug("Received file")
     # TODO: check user is Manager
     filetype = file['filetype']
     download_url = file['url_private']
@@ -62,20 +88,20 @@ def handle_im_picture(url: str, say: Say) -> None:
 
     # download image
     header = {'Authorization': f'Bearer {config.get_slack_bot_token()}'}
-    img_data = requests.get(url, headers=header).content
+    # Read straight off the socket; .content would first collect the response in
+    # chunks and then join them into a second copy. decode_content so a
+    # gzip-encoded transfer still yields image bytes
+    with _session.get(url, headers=header, stream=True, timeout=30) as resp:
+        resp.raise_for_status()
+        img_data = resp.raw.read(decode_content=True)
 
     # process picture
     phop = PhotoProcessor(img_data)
     left_buttons = phop.get_left_buttons()
     right_buttons = phop.get_right_buttons()
 
-    # list of assignments sorted by date
-    kat_list = [ka for ka in kat if ka.date is not None]
-
-    # def ka_date(ka: KitchenAssignement) -> Any:
-    #     ka.date
-
-    kat_list.sort(key=lambda i: cast(int, i.date))
+    # list of assignments sorted by date (cached in storage between pictures)
+    kat_list = kat.sorted_by_date()
     try:
         kitchen_complete_ids = [kat_list[i].id for i in left_buttons]
         chore_complete_ids = [kat_list[i].id for i in right_buttons]
@@ -84,60 +110,64 @@ def handle_im_picture(url: str, say: Say) -> None:
         say(text)
         return
 
-    text = "Kitchen completed by " + ",".join(kitchen_complete_ids) + "\n"
-    text += "Chore completed by " + ",".join(chore_complete_ids) + "\n"
-    say(text)
+    say(f"Kitchen completed by {','.join(kitchen_complete_ids)}\n"
+        f"Chore completed by {','.join(chore_complete_ids)}\n")
 
     chore_missers: list[st.User] = []
+    # Hoist the role constants; attribute lookups on the enum are loop-invariant
+    manager_role = st.UserRole.MANAGER
+    choredoer_role = st.UserRole.CHOREDOER
+    # Button index lists come back as lists; use sets for the membership tests
+    right_set = frozenset(right_buttons)
     for i, ka in enumerate(kat_list):
-        chore_complete = i in right_buttons
+        chore_complete = i in right_set
         user = ut[ka.id]
         user_roles = user.roles
-        is_manager = st.UserRole.MANAGER in user_roles
-        is_choredoer = st.UserRole.CHOREDOER in user_roles
+        is_manager = bool(user_roles & manager_role)
+        is_choredoer = bool(user_roles & choredoer_role)
 
         # TODO: check date to see what chore status should be
         # Record status in table
-        # Send reminder to incompletes
         # Refactor this to be in another file
         if is_choredoer and not chore_complete and not is_manager:
             chore_missers.append(user)
 
     say("chore missers: \n" + "\n".join([u.name for u in chore_missers]))
 
+    # Remind the incompletes, fanned out concurrently (respects test mode)
+    reminders = [
+        (u.id, f"Hello {ss.get_user_display_name(u.id)}! The chore board shows your chore as "
+               "incomplete. Please finish it as soon as you can.")
+        for u in chore_missers
+    ]
+    ss.msg_users_bulk(reminders)
+
     #   recieve picture, process picture
     #   ask user whether they would like to remind/scold/mark for fines based on time
     #   issue action, or not
 
 
+# app_home_opened needs no response body, so don't hold the Bolt worker thread
+# for the views.publish round trip
+_publish_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix='views_publish')
+
+
 def handle_home_opened(client: WebClient, event: Dict[str, Any]) -> None:
 
     user_id = event["user"]
-    _logger.info(f"home opened by user {user_id}")
+    _logger.info("home opened by user %s", user_id)
+    _publish_pool.submit(_publish_home, client, user_id)
+
 
+def _publish_home(client: WebClient, user_id: str) -> None:
     try:
-        result = client.views_publish(
-            user_id=user_id,
-            view={
-                "type": "home",
-                "callback_id": "home_view",
-                "blocks": [
-                    {
-                        "type": "section",
-                        "text": {
-                            "type": "mrkdwn",
-                            "text": "This is a test again :smile: :smile:"
-                        }
-                    }
-                ]
-            }
-        )
+        result = client.views_publish(user_id=user_id, view=_HOME_VIEW)
 
         if result["ok"] is not True:
-            _logger.error(f"views_publish: {result}")
+            _logger.error("views_publish: %s", result)
 
     except SlackApiError as e:
-        _logger.error(f"Error publishing home tab for user {event['user']}: {e}")
+        _logger.error("Error publishing home tab for user %s: %s", user_id, e)
 
 
 def start_server() -> None:
@@ -1,14 +1,30 @@
 import config
 from slack_sdk import WebClient
 from slack_sdk.errors import SlackApiError
-from typing import Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional
 import logging
+import time
 
 _logger = logging.getLogger(__name__)
 _client = WebClient(token=config.get_slack_bot_token())
 
 _test_mode = False
 
+# Display names change rarely; cache them so reminder runs don't do a users_info
+# round trip per message. Maps slack_id -> (expiry time, name).
+# 10 minutes is short enough that a renamed user isn't greeted wrong for long.
+NAME_CACHE_TTL = 600
+_name_cache: dict[str, tuple[float, str]] = {}
+
+
+def get_client() -> WebClient:
+    """
+    The shared WebClient. Reuse this instead of constructing new clients so all
+    Slack calls go through one transport.
+    """
+    return _client
+
 
 def get_test_mode() -> bool:
     return _test_mode
@@ -17,16 +33,78 @@ def get_test_mode() -> bool:
 def set_test_mode(mode: bool) -> None:
     global _test_mode
     _test_mode = mode
-    _logger.info("Test mode is {}".format("ENABLED" if _test_mode else "DISABLED"))
+    _logger.info("Test mode is %s", "ENABLED" if _test_mode else "DISABLED")
 
 
 def get_user_display_name(slack_id: str) -> str:
 
+    cached = _name_cache.get(slack_id)
+    if cached is not None and cached[0] > time.monotonic():
+        return cached[1]
+
+    name = _fetch_user_display_name(slack_id)
+    if name is None:
+        # Don't cache the failure; the next call retries so errors self-heal
+        return 'idk name'
+    _name_cache[slack_id] = (time.monotonic() + NAME_CACHE_TTL, name)
+    return name
+
+
+def msg_users_bulk(id_msg_pairs: list[tuple[str, str]], ignore_test_mode: bool = False) -> int:
+    """
+    Send a batch of DMs concurrently instead of one blocking round trip at a time.
+    Returns the number of messages actually sent.
+    """
+
+    if not id_msg_pairs:
+        return 0
+
+    def send(pair: tuple[str, str]) -> bool:
+        slack_id, msg = pair
+        try:
+            return msg_user(slack_id, msg, ignore_test_mode)
+        except Exception as e:
+            _logger.error('Failed to message user %s', slack_id)
+            _logger.error(e)
+            return False
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        return sum(1 for sent in pool.map(send, id_msg_pairs) if sent)
+
+
+def prefetch_user_display_names() -> None:
+    """Warm the display name cache for everyone with users.list instead of one
+    users.info call per user"""
+
+    expiry = time.monotonic() + NAME_CACHE_TTL
+    cursor = None
+    while True:
+        try:
+            response = _client.users_list(limit=200, cursor=cursor)
+        except SlackApiError as e:
+            _logger.error('Error prefetching user display names: %s', e)
+            return
+
+        members: list[dict[str, Any]] = response.get('members', [])
+        for m in members:
+            profile = m.get('profile', {})
+            name = profile.get('display_name') or profile.get('real_name')
+            if name:
+                _name_cache[m['id']] = (expiry, name)
+
+        meta: dict[str, Any] = response.get('response_metadata') or {}
+        cursor = meta.get('next_cursor', '')
+        if not cursor:
+            return
+
+
+def _fetch_user_display_name(slack_id: str) -> Optional[str]:
+
     try:
         response = _client.users_info(user=slack_id)
     except SlackApiError as e:
-        _logger.error(f'Error getting user display name: {str(e)}')
-        return 'idk name'
+        _logger.error('Error getting user display name: %s', e)
+        return None
 
     # _logger.info(response)
 
@@ -36,13 +114,13 @@ def get_user_display_name(slack_id: str) -> str:
             raise ValueError
     except ValueError:
         _logger.error('Invalid response to slack user info request')
-        return "idk name"
+        return None
 
     try:
         disp_name: str = user['profile']['display_name']
     except KeyError:
         _logger.error('Invalid response to slack user info request')
-        return 'idk name'
+        return None
 
     if disp_name:
         return disp_name
@@ -52,17 +130,20 @@ def get_user_display_name(slack_id: str) -> str:
         disp_name = user['profile']['real_name']
     except KeyError:
         _logger.error('Invalid response to slack user info request')
-        return 'idk name'
+        return None
 
     if disp_name:
         return disp_name
 
-    _logger.error("Could not find display name for user: " + slack_id)
-    return 'idk name'
+    _logger.error("Could not find display name for user: %s", slack_id)
+    return None
 
 
 def msg_user(slack_id: str, msg: str, ignore_test_mode: bool = False) -> bool:
-    _logger.info(f"Messaging user: {get_user_display_name(slack_id)} msg: \"{msg}\"")
+    # Only resolve the display name if the log line is actually emitted; it can
+    # cost a Slack API call on a cache miss
+    if _logger.isEnabledFor(logging.INFO):
+        _logger.info('Messaging user: %s msg: "%s"', get_user_display_name(slack_id), msg)
 
     if (not _test_mode) or ignore_test_mode:
         _client.chat_postMessage(channel=slack_id, text=msg)
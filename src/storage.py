@@ -1,14 +1,21 @@
 
-import config
-from slack_sdk import WebClient
+import slack_send
 import sqlite3
 import enum
+import functools
+import json
+import time
+import operator
 import datetime
 import logging
-from dataclasses import dataclass, fields, astuple
+from collections import OrderedDict
+from dataclasses import dataclass, fields
 from abc import ABC
+from contextlib import contextmanager
+from threading import Lock, local
 from pathlib import Path
-from typing import Any, Optional, Iterator
+from typing import Any, ClassVar, Optional, Iterable, Iterator, Union
+from typing import get_type_hints, get_origin, get_args
 from typing_extensions import Self
 
 logger = logging.getLogger(__name__)
@@ -16,6 +23,15 @@ logger = logging.getLogger(__name__)
 DB_FILE_NAME = "chorebot.db"
 DB_FILE = (Path(__file__).parent / ("../data/" + DB_FILE_NAME)).resolve()
 
+# Slack roster cache: restarting within the TTL skips the users.list round
+# trip (and its rate limit budget) on startup
+USERS_CACHE_FILE = (Path(__file__).parent / "../data/.slack_users.cache.json").resolve()
+USERS_CACHE_TTL = 600
+
+# Set while a table is building a row from a database tuple, so that the
+# field assignments in the dataclass __init__ skip the sync machinery
+_loading = local()
+
 
 @dataclass
 class TableRow(ABC):
@@ -24,50 +40,78 @@ class TableRow(ABC):
     Modifying members will update associated database entry.
     """
 
-    __slots__ = "_parent_table"
+    __slots__ = ("_parent_table", "_deferred_sync")
+
+    # per-subclass field name cache, populated on first __setattr__
+    _field_names: ClassVar[frozenset[str]]
 
     def __post_init__(self) -> None:
         """
         Called by the dataclass __init__
         """
         self._parent_table: Optional["PersistentTable[Self]"] = None
+        self._deferred_sync = False
 
     def __setattr__(self, name: str, value: Any) -> None:
-        object.__setattr__(self, name, value)
+        if getattr(_loading, 'flag', False):
+            # Row is being constructed from the database; nothing to sync
+            object.__setattr__(self, name, value)
+            return
+
+        # if this is a dataclass member update the database. The field names
+        # are cached per class as a frozenset; walking fields() here would do
+        # reflection on every attribute assignment.
+        cls = type(self)
+        try:
+            field_names = cls._field_names
+        except AttributeError:
+            field_names = frozenset(f.name for f in fields(cls))
+            cls._field_names = field_names
+
+        if name not in field_names:
+            object.__setattr__(self, name, value)
+            return
 
-        # if this is a dataclass member update the database
-        if name in (f.name for f in fields(self)):
+        # Re-assigning an identical value (roster re-syncs do this a lot)
+        # shouldn't cost a database write
+        try:
+            unchanged = getattr(self, name) == value
+        except Exception:
+            unchanged = False
+        object.__setattr__(self, name, value)
+        if not unchanged and not getattr(self, '_deferred_sync', False):
             self.sync()
 
     def set_parent_table(self, parent_table: Optional["PersistentTable[Self]"]) -> None:
         self._parent_table = parent_table
 
-    # def get_lock(self) -> Lock:
-    #     """
-    #     Get the Threading.Lock of the parent table.
-    #     """
-    #     if not hasattr(self, "_parent_table"):
-    #         # we are in TableRow initialization which means row is not yet in table
-    #         # and no need to lock
-    #         return Lock()
-    #     if self._parent_table is None:
-    #         # parent table hasn't been set, but row is initialized. Error.
-    #         raise ValueError("Cannot get lock. This row does not belong to a table.")
-    #     # Get lock from table
-    #     return self._parent_table.get_lock()
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """
+        Defer per-attribute syncs inside the block and write the row once on
+        exit. Setting N fields normally does N database transactions.
+        """
+        self._deferred_sync = True
+        try:
+            yield
+        finally:
+            self._deferred_sync = False
+            self.sync()
 
     def sync(self) -> None:
         """
         Tell the parent table to update this row.
         """
 
-        if not hasattr(self, "_parent_table"):
-            # No table, no sync
+        try:
+            parent = self._parent_table
+        except AttributeError:
+            # dataclass __init__ is still assigning fields; no table, no sync
             return
-        if self._parent_table is None:
+        if parent is None:
             # Initialized with no table, error
             raise ValueError("Cannot sync. This row does not belong to a table.")
-        return self._parent_table.update(self)
+        return parent.update(self)
 
     # @abstractmethod
     # def as_dict(self) -> dict[str, str | int]:
@@ -82,62 +126,142 @@ class TableRow(ABC):
 # TR = TypeVar("TR", bound=TableRow)
 
 
+# SQLite affinities for builtin column types. Anything else falls back to the
+# type's own name so the registered converters (UserRole, date) still match.
+_COLUMN_AFFINITY = {str: "TEXT", int: "INTEGER", float: "REAL", bytes: "BLOB"}
+
+
+@functools.cache
+def _schema_for(row_type: type) -> tuple[tuple[str, ...], str]:
+    """
+    Field names and the CREATE TABLE column list for a row type. Cached so
+    the annotation reflection runs once per row type rather than per table.
+    """
+    hints = get_type_hints(row_type)
+    fieldnames = tuple(f.name for f in fields(row_type))
+    coltypes = []
+    for name in fieldnames:
+        t = hints[name]
+        if get_origin(t) is Union:
+            # Optional[X]: the column holds X, just nullable. Declaring the
+            # column as "Optional" would bypass the converters.
+            args = [a for a in get_args(t) if a is not type(None)]
+            if len(args) == 1:
+                t = args[0]
+        coltypes.append(_COLUMN_AFFINITY.get(t, t.__name__))
+    column_str = f"{fieldnames[0]} {coltypes[0]} PRIMARY KEY, " \
+        + ", ".join(f"{n} {t}" for n, t in zip(fieldnames[1:], coltypes[1:]))
+    return fieldnames, column_str
+
+
 class PersistentTable[TR: TableRow]:
     """
     Table-like object that interfaces to a database
     """
 
+    ROW_CACHE_MAX = 128
+
     def __init__(self, table_name: str, row_type: type[TR], truncate: bool = False):
         self.table_name = table_name
         self.row_type: type[TR] = row_type
-        row_fields = fields(self.row_type)
-        self.fieldnames = tuple(f.name for f in row_fields)
-
-        fieldtypes = tuple(f.type.__name__ for f in row_fields
-                           if hasattr(f.type, '__name__'))
-
-        if len(row_fields) != len(fieldtypes):
-            raise TypeError("Table row type does not have __name__??")
-
-        # print(self.fieldnames[0])
-        # print(type(self.fieldnames[0]))
-        # print(fields(self.row_type)[0].type.__name__)
-        # print(name(fields(self.row_type)[0].type))
-        # print(type(fields(self.row_type)[0].type))
+        # Incremented on every write so callers can cache derived views
+        self.version = 0
+        self.fieldnames, column_str = _schema_for(row_type)
 
         # Create table if it does not exist
-        column_str = f"{self.fieldnames[0]} {fieldtypes[0]} PRIMARY KEY, " \
-            + ", ".join(f"{n} {t}" for n, t in zip(self.fieldnames[1:], fieldtypes[1:]))
         sql = f"CREATE TABLE IF NOT EXISTS {self.table_name}({column_str})"
-        # print(sql)
-        con = sqlite3.connect(DB_FILE)
+
+        # One long-lived connection. Connecting per call paid connection setup on
+        # every access and threw away sqlite's page cache between calls. Slack
+        # events arrive on several threads; individual statements are serialized
+        # by the sqlite3 module itself, and the lock keeps multi-statement write
+        # transactions atomic.
+        self._con = sqlite3.connect(DB_FILE, detect_types=sqlite3.PARSE_DECLTYPES,
+                                    check_same_thread=False)
+        self._lock = Lock()
+        # WAL lets readers proceed alongside the writer, and synchronous=NORMAL
+        # coalesces the two fsyncs per commit that the rollback journal required
+        self._con.execute("PRAGMA journal_mode=WAL")
+        self._con.execute("PRAGMA synchronous=NORMAL")
+        self._con.execute("PRAGMA temp_store=MEMORY")
+        self._con.execute("PRAGMA cache_size=-8000")
         # truncate table if set
         if truncate:
-            con.execute(f"DROP TABLE IF EXISTS {self.table_name}")
-        con.execute(sql)
+            self._con.execute(f"DROP TABLE IF EXISTS {self.table_name}")
+        self._con.execute(sql)
         # res = con.execute(("SELECT name FROM sqlite_master",
         #                    "WHERE type='table'",
         #                    "AND name=?"), self.table_name)
         # table_exists = res.fetchone() is not None
-        con.close()
+
+        # Statements used by the accessors below. Built once here so the hot
+        # paths (every attribute write goes through update) don't reconstruct
+        # the same f-strings per call.
+        placeholders = ", ".join('?' * len(self.fieldnames))
+        pk_col = self.fieldnames[0]
+        # Field extraction as one C-level call; astuple() walks fields() and
+        # recursively copies on every write
+        self._to_tuple = operator.attrgetter(*self.fieldnames)
+        self._insert_sql = f"INSERT INTO {self.table_name} VALUES({placeholders})"
+        self._update_sql = (f"UPDATE {self.table_name} SET "
+                            + ", ".join(f"{n} = ?" for n in self.fieldnames[1:])
+                            + f" WHERE {pk_col} = ?")
+        self._select_row_sql = f"SELECT * FROM {self.table_name} WHERE {pk_col} = ?"
+        self._select_all_sql = f"SELECT * FROM {self.table_name}"
+        self._count_sql = f"SELECT count() FROM {self.table_name}"
+        self._keys_sql = f"SELECT {pk_col} FROM {self.table_name}"
+
+        # Recently fetched rows by primary key. Message handlers resolve the
+        # same few users over and over; skip the SELECT and row construction
+        # for them. Rows sync themselves on mutation, so a cached instance
+        # stays consistent with the database.
+        self._row_cache: OrderedDict[Any, TR] = OrderedDict()
 
     def append(self, row: TR) -> None:
         """
         Append a new row to the table
         """
-        if tuple(f.name for f in fields(row)) != self.fieldnames:
+        if type(row) is not self.row_type:
             raise ValueError("Invalid row passed to append")
 
         row.set_parent_table(self)
-        sql = (f"INSERT INTO {self.table_name} VALUES"
-               "(" + ", ".join('?' * len(self.fieldnames)) + ")")
-        # print(sql)
-        # print(astuple(row))
-        con = sqlite3.connect(DB_FILE)
-        con.execute(sql,
-                    astuple(row))
-        con.commit()
-        con.close()
+        with self._lock:
+            self._con.execute(self._insert_sql, self._to_tuple(row))
+            self._con.commit()
+            self.version += 1
+
+    def append_many(self, rows: Iterable[TR]) -> None:
+        """
+        Append several rows in a single transaction. Much cheaper than per-row
+        append, which commits (and fsyncs) each insert separately.
+        """
+        rows = list(rows)
+        if not rows:
+            return
+        for row in rows:
+            if type(row) is not self.row_type:
+                raise ValueError("Invalid row passed to append_many")
+            row.set_parent_table(self)
+
+        # Serialize the rows before taking the lock; only the database work
+        # needs to be in the critical section
+        params = [self._to_tuple(r) for r in rows]
+        with self._lock:
+            self._con.executemany(self._insert_sql, params)
+            self._con.commit()
+            self.version += 1
+
+    def _load_row(self, r: tuple[Any, ...]) -> TR:
+        """
+        Build a row from a database tuple with the sync machinery disabled.
+        """
+        _loading.flag = True
+        try:
+            row = self.row_type(*r)
+        finally:
+            _loading.flag = False
+        row.set_parent_table(self)
+        return row
 
     # TODO: I'd like row to use TR so that sub tables are bound to the sub row types,
         # but mypy doesn't like that
@@ -145,41 +269,36 @@ class PersistentTable[TR: TableRow]:
         """
         Replace a row with the one given if the primary key exists
         """
-        # validate field names
-        if tuple(f.name for f in fields(row)) != self.fieldnames:
+        # validate row type
+        if type(row) is not self.row_type:
             raise ValueError("Invalid row passed to append")
-        # check if exists by primary key (first column)
-        pk_col = self.fieldnames[0]
-        pk_val = astuple(row)[0]
-        con = sqlite3.connect(DB_FILE)
-        res = con.execute((f"SELECT {pk_col} FROM {self.table_name} WHERE {pk_col} = ?"),
-                          (pk_val,))
-        if res.fetchone() is None:
-            con.close()
+        # One statement does the existence check and the write; rowcount says
+        # whether the primary key matched
+        params = self._to_tuple(row)
+        pk_val = params[0]
+        with self._lock:
+            cur = self._con.execute(self._update_sql, params[1:] + (pk_val,))
+            changed = cur.rowcount
+            self._con.commit()
+            if changed:
+                self.version += 1
+        if changed == 0:
             raise ValueError("Attempt to update row that does not exist")
-
-        # Row exists with this primary key. Replace it.
-        sql = f"REPLACE INTO {self.table_name} VALUES(" \
-            + ", ".join('?' * len(self.fieldnames)) + ")"
-        con.execute(sql, astuple(row))
-        con.commit()
-        con.close()
+        # Drop any cached instance unless it is the one just written
+        if self._row_cache.get(pk_val) is not row:
+            self._row_cache.pop(pk_val, None)
 
     # TODO: fix the "Any" here
     def keys(self) -> tuple[Any]:
-        pk_col = self.fieldnames[0]
-        con = sqlite3.connect(DB_FILE)
-        res = con.execute((f"SELECT {pk_col} FROM {self.table_name}"))
+        res = self._con.execute(self._keys_sql)
         all = res.fetchall()
-        con.close()
         return tuple(a[0] for a in all)
 
     def __len__(self) -> int:
         """
         Return the number of rows in the table
         """
-        con = sqlite3.connect(DB_FILE)
-        res = con.execute(f"SELECT count() FROM {self.table_name}")
+        res = self._con.execute(self._count_sql)
         n = res.fetchone()[0]
         assert isinstance(n, int)
         return n
@@ -189,23 +308,28 @@ class PersistentTable[TR: TableRow]:
         """
         Return row with primary key of key
         """
-        con = sqlite3.connect(DB_FILE, detect_types=sqlite3.PARSE_DECLTYPES)
-        res = con.execute(f"SELECT * FROM {self.table_name} WHERE {self.fieldnames[0]} = ?", (key,))
-        row = self.row_type(*res.fetchone())
-        row.set_parent_table(self)
-        con.close()
+        cached = self._row_cache.get(key)
+        if cached is not None:
+            self._row_cache.move_to_end(key)
+            return cached
+
+        res = self._con.execute(self._select_row_sql, (key,))
+        row = self._load_row(res.fetchone())
+        self._row_cache[key] = row
+        if len(self._row_cache) > self.ROW_CACHE_MAX:
+            self._row_cache.popitem(last=False)
         return row
 
     def __iter__(self) -> Iterator[TR]:
         """
         Iterate over the table rows
         """
-        con = sqlite3.connect(DB_FILE, detect_types=sqlite3.PARSE_DECLTYPES)
-        res = con.execute(f"SELECT * FROM {self.table_name}")
-        for r in res:
-            row = self.row_type(*r)
-            row.set_parent_table(self)
-            yield row
+        # Fetch everything up front so the cursor (and sqlite's read state) is
+        # done with before the first row is handed out; callers consume the
+        # whole table anyway.
+        rows = self._con.execute(self._select_all_sql).fetchall()
+        for r in rows:
+            yield self._load_row(r)
 
 
 # TODO: Add role for monthly manager chore
@@ -257,19 +381,92 @@ class UserTable(PersistentTable[User]):
 
     def __init__(self, truncate: bool = False):
         super().__init__(self.TABLE_NAME, User, truncate)
+        self._by_id: dict[str, User] = {}
+        self._by_id_version = -1
+        self._by_name: dict[str, User] = {}
+        self._by_name_version = -1
+        self._by_role: dict[UserRole, tuple[User, ...]] = {}
+        self._by_role_version = -1
         self.update_from_slack()
 
-    def update_from_slack(self) -> None:
-        client = WebClient(token=config.get_slack_bot_token())
+    def _id_index(self) -> dict[str, User]:
+        if self.version != self._by_id_version:
+            self._by_id = {u.id: u for u in self}
+            self._by_id_version = self.version
+        return self._by_id
+
+    def get_user_by_slack_id(self, slack_id: str) -> Optional[User]:
+        """
+        O(1) lookup by slack id. The index is rebuilt lazily when the table changes.
+        """
+        return self._id_index().get(slack_id)
+
+    def __getitem__(self, key: Any) -> User:
+        user = self._id_index().get(key)
+        if user is None:
+            # Unknown id; let the base class raise the way it always has
+            return super().__getitem__(key)
+        return user
+
+    def get_user_by_name(self, name: str) -> Optional[User]:
+        """
+        O(1) lookup by name. The index is rebuilt lazily when the table changes.
+        """
+        if self.version != self._by_name_version:
+            self._by_name = {u.name: u for u in self}
+            self._by_name_version = self.version
+        return self._by_name.get(name)
+
+    def users_with_role(self, role: UserRole) -> tuple[User, ...]:
+        """
+        All users holding the given role. Cached per role until the table changes.
+        """
+        if self.version != self._by_role_version:
+            self._by_role = {}
+            self._by_role_version = self.version
+        cached = self._by_role.get(role)
+        if cached is None:
+            cached = tuple(u for u in self if role in u.roles)
+            self._by_role[role] = cached
+        return cached
+
+    def _get_slack_members(self, force: bool = False) -> list[dict[str, Any]]:
+        # Serve the roster from a short-lived disk cache first, unless the
+        # caller explicitly wants a fresh fetch
+        if not force:
+            try:
+                if time.time() - USERS_CACHE_FILE.stat().st_mtime < USERS_CACHE_TTL:
+                    with open(USERS_CACHE_FILE) as f:
+                        members: list[dict[str, Any]] = json.load(f)
+                    return members
+            except (OSError, ValueError):
+                # No cache or an unreadable one; ask slack
+                pass
+
+        client = slack_send.get_client()
         resp = client.users_list()
-        try:
-            members: list[dict[str, Any]] = resp.get("members", [])
-            if members == []:
-                raise ValueError
-        except ValueError:
+        members = resp.get("members", [])
+        if members == []:
             logger.error("Error retrieving slack user list!")
+            return []
+
+        try:
+            with open(USERS_CACHE_FILE, 'w') as f:
+                json.dump(members, f)
+        except OSError:
+            logger.warning("Could not write slack user cache")
+        return members
 
-        local_users = self.keys()
+    def update_from_slack(self, force: bool = False) -> None:
+        """
+        Pull the member roster and add anyone new. With force, skip the disk
+        cache and always ask slack — the admin's manual refresh path.
+        """
+        members = self._get_slack_members(force)
+
+        # frozenset so the membership test below is O(1) per slack member
+        local_users = frozenset(self.keys())
+        new_users: list[User] = []
         for m in members:
             # ignore users that are deleted, bots, or already in table
             deleted = m["deleted"]
@@ -284,10 +481,13 @@ class UserTable(PersistentTable[User]):
             #     logger.warning(f"User {real_name} already exists with different UID!")
             #     continue
             # Default to resident and choredoer
-            self.append(
+            new_users.append(
                 User(id=uid, name=real_name, roles=UserRole.RESIDENT | UserRole.CHOREDOER)
             )
 
+        # Insert everyone in one transaction
+        self.append_many(new_users)
+
 
 @dataclass(slots=True)
 class KitchenAssignment(TableRow):
@@ -321,35 +521,52 @@ class KitchenAssignmentTable(PersistentTable[KitchenAssignment]):
 
     def __init__(self, slack_ids: tuple[str], truncate: bool = False):
         super().__init__(self.TABLE_NAME, KitchenAssignment, truncate)
+        self._by_swap: dict[datetime.date, KitchenAssignment] = {}
+        self._by_day: dict[int, KitchenAssignment] = {}
+        self._date_index_version = -1
+        self._sorted_cache: list[KitchenAssignment] = []
+        self._sorted_version = -1
         self.ensure_ids(slack_ids)
 
+    def sorted_by_date(self) -> list[KitchenAssignment]:
+        """
+        Assignments that have a date, sorted by date. Cached until the table changes.
+        """
+        if self.version != self._sorted_version:
+            assigned = [ka for ka in self if ka.date is not None]
+            assigned.sort(key=operator.attrgetter('date'))
+            self._sorted_cache = assigned
+            self._sorted_version = self.version
+        return self._sorted_cache
+
     def ensure_ids(self, slack_ids: tuple[str]) -> None:
         """
         Ensure all IDs are in table
         """
-        current_ids = self.keys()
+        current_ids = frozenset(self.keys())
         new_ids = [id for id in slack_ids if id not in current_ids]
 
-        # Add new to table
-        for id in new_ids:
-            row = KitchenAssignment(id=id)
-            self.append(row)
+        # Add new to table in one transaction
+        self.append_many([KitchenAssignment(id=id) for id in new_ids])
 
     def get_assignment_by_date(self, date: int) -> Optional[KitchenAssignment]:
         # target date this month
         today = datetime.date.today()
         target_date = today.replace(day=date)
-        for a in self:
-            if a.swap_date == target_date:
-                return a
-
-        # No swap
-        for a in self:
-            if a.date == date:
-                return a
-
-        # No kitchen cleaner today
-        return None
+        # The table is small and this runs per reminder tick; serve it from
+        # dicts rebuilt lazily when the table changes
+        if self.version != self._date_index_version:
+            assignments = list(self)
+            self._by_swap = {a.swap_date: a for a in assignments if a.swap_date is not None}
+            self._by_day = {a.date: a for a in assignments if a.date is not None}
+            self._date_index_version = self.version
+
+        # A swap takes priority over the regular assignment; returns None when
+        # there is no kitchen cleaner today
+        swapped = self._by_swap.get(target_date)
+        if swapped is not None:
+            return swapped
+        return self._by_day.get(date)
 
 
 _user_table: UserTable | None = None
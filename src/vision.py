@@ -1,14 +1,19 @@
 import numpy as np
 import cv2 as cv
 from cv2.typing import MatLike
-import math
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Any, cast
+import logging
 import os
 import time
 
+_logger = logging.getLogger(__name__)
+
 # map from gimp to opencv
 def hsv_map(hsv: list[int]) -> np.ndarray:
-    return np.array([hsv[0] * 180/256, hsv[1] * 256/256, hsv[2] * 256/256])
+    # uint8 up front; float64 bounds make inRange convert them on every call
+    return np.array([hsv[0] * 180 // 256, hsv[1], hsv[2]], dtype=np.uint8)
 
 # HSV range of white paint
 WHITE_LOW = hsv_map([0, 0, 200])
@@ -49,43 +54,70 @@ BUTTON_RECT_OFFSET_Y =      1/6 * ROW_HEIGHT
 LEFT_COLOR_CUTOFF =         1/5 * BUTTON_RECT_HEIGHT * BUTTON_RECT_WIDTH_LEFT
 RIGHT_COLOR_CUTOFF =        1/10 * BUTTON_RECT_HEIGHT * BUTTON_RECT_WIDTH_RIGHT
 
+# The button ROI bounds on the warped canvas are fixed by the constants above,
+# so build the slices once at import instead of re-deriving them per photo
+_ROW_SLICES = [slice(int(ROW_HEIGHT * i + BUTTON_RECT_OFFSET_Y),
+                     int(ROW_HEIGHT * i + BUTTON_RECT_OFFSET_Y) + int(BUTTON_RECT_HEIGHT))
+               for i in range(NUMBER_BUTTONS)]
+_LEFT_COLS = slice(0, int(BUTTON_RECT_WIDTH_LEFT))
+_RIGHT_COLS = slice(int(SCALE_WIDTH - BUTTON_RECT_WIDTH_RIGHT), SCALE_WIDTH)
+_ROW_STARTS = np.array([s.start for s in _ROW_SLICES])
+_ROW_STOPS = np.array([s.stop for s in _ROW_SLICES])
+
+
+def _roi_counts(mask: MatLike) -> np.ndarray:
+    """
+    Set-pixel count inside every button row of a strip mask, from one
+    cumulative sum over row totals instead of a scan per row.
+    """
+    cum: np.ndarray = np.concatenate(([0], np.cumsum(mask.sum(axis=1, dtype=np.int64))))
+    counts: np.ndarray = (cum[_ROW_STOPS] - cum[_ROW_STARTS]) // 255
+    return counts
+
 PHOTO_LOG_DIR = str((Path(__file__).parent / "../data/pics").resolve())
 
+# When an OpenCL device is available, feeding cv.UMat inputs makes OpenCV run
+# the per-pixel stages (cvtColor/inRange/morphology/Hough) on it transparently
+_USE_OPENCL = cv.ocl.haveOpenCL()
+# The line mask bounds wrapped once as UMats: the UMat overload of inRange
+# wants UMat bounds, and this skips re-uploading them per photo.
+# casts: the cv2 stubs' UMat constructor overloads don't accept a plain ndarray
+_WHITE_LOW_U = cv.UMat(cast(Any, WHITE_LOW))
+_WHITE_HIGH_U = cv.UMat(cast(Any, WHITE_HIGH))
+
+# Let OpenCV's internal parallel_for spread the full-frame filters over every core
+cv.setNumThreads(os.cpu_count() or 1)
+
+# Row height of the tiles the line-mask threshold works through. Small enough
+# that a tile's HSV pixels stay in cache between cvtColor and inRange.
+_MASK_TILE_ROWS = 128
+
+# Debug frames are encoded and written off-thread so the five jpegs per photo
+# don't sit on the Slack event handler's critical path
+_LOG_POOL = ThreadPoolExecutor(max_workers=1, thread_name_prefix='photo_log')
+
+
+def _log_photo(path: str, img: "MatLike | cv.UMat") -> None:
+    # Copy because later pipeline steps may draw on the same buffer
+    img = img.get() if isinstance(img, cv.UMat) else img.copy()
+    _LOG_POOL.submit(cv.imwrite, path, img)
+
+
 class ChoreBoardNotFound(Exception):
     pass
 
-def slope(line: MatLike) -> float:
-    x1: int = line[0]
-    y1: int = line[1]
-    x2: int = line[2]
-    y2: int = line[3]
-    return (y2-y1) / (x2-x1)
-
-def approx_distance(l1: MatLike, l2: MatLike) -> float:
-    # Compute approximate perpindicular distance between two lines with similar slopes
-    # Average slope is probably good enough but might be more accurate near x=0?
-    m1 = slope(l1)
-    m2 = slope(l2)
-    m: float = (m1+m2)/2
-    # offset x by avg so around x=0
-    x1,y1 = l1[:2]
-    x2,y2 = l2[:2]
-    avgx = (x1+x2)/2
-    x1 -= avgx
-    x2 -= avgx
-    b1: float = y1 - m1*x1
-    b2: float = y2 - m2*x2
-    return abs(b2 - b1) / math.sqrt(m**2 + 1)
-
-# def max_dist(l1,l2):
-#     return max(abs(lx1-lx2) for lx1,lx2 in zip(l1,l2))
-
 class PhotoProcessor():
 
     def __init__(self, image: bytes, log_photos: bool = True):
 
         npimg = np.frombuffer(image, dtype=np.uint8)
-        self.image: MatLike = cv.imdecode(npimg, cv.IMREAD_COLOR)
+        # Decode at half resolution; the board gets warped onto a 1000x1500
+        # canvas anyway and every filter downstream scales with pixel count.
+        # The detection constants are all width-relative so nothing retunes.
+        # Board orientation is fixed by how the user frames it, so skip the
+        # EXIF rotation pass too
+        self.image: MatLike = cv.imdecode(
+            npimg, cv.IMREAD_REDUCED_COLOR_2 | cv.IMREAD_IGNORE_ORIENTATION)
         self.image_processed: MatLike
 
         self.left_buttons_idx: list[int]
@@ -93,7 +125,13 @@ class PhotoProcessor():
 
         self.log_photos = log_photos
 
-        self._extract_features()
+        try:
+            self._extract_features()
+        except ChoreBoardNotFound:
+            # Maybe the lines were lost to the downscale, or the EXIF rotation
+            # we skipped actually mattered; retry at full size with it applied
+            self.image = cv.imdecode(npimg, cv.IMREAD_COLOR)
+            self._extract_features()
 
     def show(self) -> None:
                
@@ -115,86 +153,121 @@ class PhotoProcessor():
         img = self.image
         img_width,img_height = img.shape[:2]
 
+        if self.log_photos:
+            photo_name_prefix = PHOTO_LOG_DIR + "/" + time.strftime("%Y%m%d_%H%M%S/")
+            os.makedirs(photo_name_prefix, exist_ok=True)
+
         # Find lines between rows
         # Mask the line color
-        line_mask = cv.inRange(cv.cvtColor(img, cv.COLOR_BGR2HSV), WHITE_LOW, WHITE_HIGH)
+        if _USE_OPENCL:
+            # cast: the cv2 stubs' UMat overloads don't accept a plain ndarray
+            line_mask = cv.inRange(cv.cvtColor(cv.UMat(cast(Any, img)), cv.COLOR_BGR2HSV),
+                                   _WHITE_LOW_U, _WHITE_HIGH_U)
+        else:
+            # Convert and threshold a tile of rows at a time into reused
+            # buffers. The full-frame HSV image is only ever consumed once by
+            # inRange, so tiling keeps it out of memory entirely instead of
+            # writing and re-reading 3 bytes per pixel
+            line_mask = np.empty(img.shape[:2], np.uint8)
+            hsv_tile = np.empty((_MASK_TILE_ROWS, img.shape[1], 3), np.uint8)
+            for y in range(0, img.shape[0], _MASK_TILE_ROWS):
+                stop = min(y + _MASK_TILE_ROWS, img.shape[0])
+                hsv = cv.cvtColor(img[y:stop], cv.COLOR_BGR2HSV, dst=hsv_tile[:stop - y])
+                cv.inRange(hsv, WHITE_LOW, WHITE_HIGH, dst=line_mask[y:stop])
         # cv.imshow("line_mask",line_mask)
         # cv.waitKey()
         if self.log_photos:
-            photo_name_prefix = PHOTO_LOG_DIR + "/" + time.strftime("%Y%m%d_%H%M%S/")
-            os.makedirs(photo_name_prefix, exist_ok=True)
-            cv.imwrite(photo_name_prefix + "1_linemask.jpg", line_mask)
+            _log_photo(photo_name_prefix + "1_linemask.jpg", line_mask)
 
         # Use erosion to thin noise and dilation to make thick what's left
         ero_kern_size = int(img_width * ERO_KERNEL_MULT // 2 * 2 + 1) # make odd
-        ero_kern = np.ones((1,ero_kern_size), np.uint8)
-        ero = cv.erode(line_mask, ero_kern, iterations=3)
+        # One pass with a 3x-wide flat kernel is identical to three passes
+        # with the base kernel and reads the mask once instead of three times
+        ero_kern = np.ones((1, 3 * (ero_kern_size - 1) + 1), np.uint8)
+        ero = cv.erode(line_mask, ero_kern)
         if self.log_photos:
-            cv.imwrite(photo_name_prefix + "2_erode.jpg", ero)
+            _log_photo(photo_name_prefix + "2_erode.jpg", ero)
 
         dil_kern_size = int(img_width * DIL_KERNEL_MULT // 2 * 2 + 1) # make odd
         dil_kern = np.ones((dil_kern_size,)*2, np.uint8)
-        dil = cv.dilate(ero, dil_kern, iterations=1)
+        # line_mask isn't needed past this point; reuse its buffer for the
+        # dilate output instead of allocating another full-frame mask
+        dil = cv.dilate(ero, dil_kern, dst=line_mask, iterations=1)
         if self.log_photos:
-            cv.imwrite(photo_name_prefix + "3_dilate.jpg", dil)
+            _log_photo(photo_name_prefix + "3_dilate.jpg", dil)
 
         #TODO: Could do edge detection here to decrease lines and allow for pictures from further 
         # away without walls etc?
 
-        line_image = np.copy(img)  # creating a blank to draw lines on
-
         # Run HoughLines to get white row lines
         # Output "lines" is an array containing endpoints of detected line segments
-        print(img_width)
+        _logger.debug("image width: %s", img_width)
         min_length = img_width * HL_MIN_LINE_LENGTH_MULT
         max_gap = img_width * HL_MAX_LINE_GAP_MULT
-        lines: MatLike = cv.HoughLinesP(dil, HL_RHO, HL_THETA, HL_THRESHOLD, 
+        lines: MatLike = cv.HoughLinesP(dil, HL_RHO, HL_THETA, HL_THRESHOLD,
                                         np.array([]), min_length, max_gap)
 
+        if isinstance(lines, cv.UMat):
+            # The grouping below is host-side numpy
+            lines = lines.get()
         if lines is None:
             raise ChoreBoardNotFound("The chore board was not found in the picture! "
                     "Make sure the chore board is in frame and the lighting is adaquate.")
 
-        print("number of lines pre-grouping:",len(lines))
+        _logger.debug("number of lines pre-grouping: %s", len(lines))
 
         # We have multiple lines per line. Group so they can be counted.
-        group_lines: list[MatLike] = []
-        group_line_num: list[int] = []
-        for li in lines:
-            li = li[0]    # line is one more deep
-
-            if abs(slope(li)) > MAX_SLOPE:
-                continue
-
-            # Check grouped lines for this line
-            found = False
-            for i,gl in enumerate(group_lines):
-                if (abs(slope(li) - slope(gl)) < MAX_SLOPE_DIF 
-                        and approx_distance(li,gl) < img_height * MAX_LINE_DIST_MULT):
-                    # Group this line. Use points with min/max x
-                    p = [li[:2], li[2:], gl[:2], gl[2:]]
-                    minp = p[0]
-                    maxp = p[0]
-                    for pi in p[1:]:
-                        minp = min(minp, pi, key=lambda x: x[0])
-                        maxp = max(maxp, pi, key=lambda x: x[0])
-                    # This also ensures that the x1,y1 are on the "left" (small x)
-                    gl[:2] = minp
-                    gl[2:] = maxp
-                    found = True
-                    break
-            if found:
-                continue
-            else:
-                group_lines.append(li)
-                group_line_num.append(1)
-
-        for line in group_lines:
-            x1,y1,x2,y2 = line
-            cv.line(line_image,(x1,y1),(x2,y2),(255,0,0),5)
+        # Slopes and intercepts are computed once as arrays; per-pair scalar
+        # slope/distance calls in Python were the hot spot here.
+        pts = lines.reshape(-1, 4).astype(np.int32)
+        # Normalize segments so (x1,y1) is the small-x endpoint
+        flip = pts[:, 0] > pts[:, 2]
+        pts[flip] = pts[flip][:, [2, 3, 0, 1]]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            slopes = (pts[:, 3] - pts[:, 1]) / (pts[:, 2] - pts[:, 0])
+        keep = np.abs(slopes) <= MAX_SLOPE
+        pts = pts[keep]
+        slopes = slopes[keep]
+
+        # Sort by x=0 intercept and sweep once: segments of the same board row
+        # land adjacent, so grouping becomes a neighbor gap check instead of a
+        # compare-against-every-group pass
+        max_dist = img_height * MAX_LINE_DIST_MULT
+        intercepts = pts[:, 1] - slopes * pts[:, 0]
+        order = np.argsort(intercepts)
+        pts = pts[order]
+        slopes = slopes[order]
+        intercepts = intercepts[order]
+
+        if len(pts):
+            # Perpendicular distance between near-parallel lines is the
+            # intercept gap over sqrt(1 + m^2)
+            m_avg = (slopes[1:] + slopes[:-1]) / 2
+            gaps = np.diff(intercepts) / np.sqrt(m_avg ** 2 + 1)
+            new_group = np.empty(len(pts), dtype=bool)
+            new_group[0] = True
+            new_group[1:] = gaps >= max_dist
+            group_ids = np.cumsum(new_group) - 1
+            ngroups = int(group_ids[-1]) + 1
+        else:
+            group_ids = np.empty(0, dtype=np.intp)
+            ngroups = 0
+
+        # Each group spans from its smallest-x endpoint to its largest
+        group_lines = np.empty((ngroups, 4), dtype=np.int32)
+        for g in range(ngroups):
+            members = pts[group_ids == g]
+            group_lines[g, :2] = members[np.argmin(members[:, 0]), :2]
+            group_lines[g, 2:] = members[np.argmax(members[:, 2]), 2:]
 
         if self.log_photos:
-            cv.imwrite(photo_name_prefix + "4_lines.jpg", line_image)
+            # Only copy the frame and draw the grouped lines when they are
+            # actually going to disk
+            line_image = np.copy(img)
+            for line in group_lines:
+                x1,y1,x2,y2 = line
+                cv.line(line_image,(x1,y1),(x2,y2),(255,0,0),5)
+            _log_photo(photo_name_prefix + "4_lines.jpg", line_image)
 
         if len(group_lines) != NUMBER_WHITE_LINES:
             raise ChoreBoardNotFound("The chore board was not identified. When looking for the "
@@ -204,11 +277,13 @@ class PhotoProcessor():
 
 
         # Get corners so we can do a perspective transform
-        # first point is always smaller x due to above
-        c1 = max(group_lines, key=lambda x: x[1])[:2]
-        c2 = min(group_lines, key=lambda x: x[1])[:2]
-        c3 = max(group_lines, key=lambda x: x[3])[2:]
-        c4 = min(group_lines, key=lambda x: x[3])[2:]
+        # first point is always smaller x due to above; group_lines is a (K,4)
+        # array so the extremes are column argmax/argmin rather than Python
+        # max()/min() with key lambdas
+        c1 = group_lines[np.argmax(group_lines[:, 1]), :2]
+        c2 = group_lines[np.argmin(group_lines[:, 1]), :2]
+        c3 = group_lines[np.argmax(group_lines[:, 3]), 2:]
+        c4 = group_lines[np.argmin(group_lines[:, 3]), 2:]
 
         src = np.array([c1,c2,c3,c4], dtype=np.float32)
         dst = np.array(
@@ -217,48 +292,38 @@ class PhotoProcessor():
             [SCALE_WIDTH,   SCALE_HEIGHT],
             [SCALE_WIDTH,   0]], dtype=np.float32
         )
-        print(src, src.shape)
-        print(dst, dst.shape)
+        if _logger.isEnabledFor(logging.DEBUG):
+            # Formatting the corner arrays isn't free; only do it when shown
+            _logger.debug("warp src: %s %s", src, src.shape)
+            _logger.debug("warp dst: %s %s", dst, dst.shape)
         M = cv.getPerspectiveTransform(src, dst)
-        img_scale = cv.warpPerspective(img, M, dsize=(SCALE_WIDTH, SCALE_HEIGHT))
+        # Nearest neighbor is enough: the warp only feeds color thresholding
+        # and counting, and it's several taps per pixel cheaper than bilinear
+        img_scale = cv.warpPerspective(img, M, dsize=(SCALE_WIDTH, SCALE_HEIGHT),
+                                       flags=cv.INTER_NEAREST)
 
         # Detect button orientation by looking in a specific rectangle and checking color
-        left_buttons = np.zeros(NUMBER_BUTTONS)
-        right_buttons = np.zeros(NUMBER_BUTTONS)
-        for i in range(NUMBER_BUTTONS):
-            # Left buttons
-            button_rect_left = np.array([BUTTON_RECT_WIDTH_LEFT, BUTTON_RECT_HEIGHT], 
-                                        dtype=np.int32)
-            lp1 = np.array([0, ROW_HEIGHT * i + BUTTON_RECT_OFFSET_Y], dtype=np.int32)
-            lp2 = lp1 + button_rect_left
-            img_left = img_scale[lp1[1]:lp2[1], lp1[0]:lp2[0]]
-            hsv_left = cv.cvtColor(img_left, cv.COLOR_BGR2HSV)
-            mask_left = cv.inRange(hsv_left, WHITE_BUTTON_LOW, WHITE_BUTTON_HIGH)
-            left_buttons[i] = np.count_nonzero(mask_left) > LEFT_COLOR_CUTOFF
-            # cv.imshow('left img', mask_left)
-            # print(np.count_nonzero(mask_left), LEFT_COLOR_CUTOFF)
-            # cv.waitKey()
-            c = (0,255,0) if left_buttons[i] else (0,0,255) 
-            cv.rectangle(img_scale, lp1, lp2, c,1)
-
-
-            # Right buttons
-            rect_right = np.array([BUTTON_RECT_WIDTH_RIGHT, BUTTON_RECT_HEIGHT], dtype=np.int32)
-            rp1 = np.array(
-                [SCALE_WIDTH - BUTTON_RECT_WIDTH_RIGHT, ROW_HEIGHT * i + BUTTON_RECT_OFFSET_Y], 
-                dtype=np.int32)
-            rp2 = rp1 + rect_right
-            img_right = img_scale[rp1[1]:rp2[1], rp1[0]:rp2[0]]
-            hsv_right = cv.cvtColor(img_right, cv.COLOR_BGR2HSV)
-            mask_right = cv.inRange(hsv_right, GREEN_BUTTON_LOW, GREEN_BUTTON_HIGH)
-            right_buttons[i] = np.count_nonzero(mask_right) > RIGHT_COLOR_CUTOFF
-            # cv.imshow('right img', mask_right)
-            # cv.waitKey()
-            c = (0,255,0) if right_buttons[i] else (0,0,255) 
-            cv.rectangle(img_scale, rp1,rp2, c, 1)
+        # Convert the warped board to HSV once and mask each button column in a
+        # single inRange, rather than a conversion and mask per tiny ROI
+        hsv_scale = cv.cvtColor(img_scale, cv.COLOR_BGR2HSV)
+        mask_left = cv.inRange(hsv_scale[:, _LEFT_COLS], WHITE_BUTTON_LOW, WHITE_BUTTON_HIGH)
+        mask_right = cv.inRange(hsv_scale[:, _RIGHT_COLS], GREEN_BUTTON_LOW, GREEN_BUTTON_HIGH)
+
+        left_buttons = _roi_counts(mask_left) > LEFT_COLOR_CUTOFF
+        right_buttons = _roi_counts(mask_right) > RIGHT_COLOR_CUTOFF
+
+        if self.log_photos:
+            # Marker rectangles are debug output only
+            for i, rows in enumerate(_ROW_SLICES):
+                c = (0,255,0) if left_buttons[i] else (0,0,255)
+                cv.rectangle(img_scale, (_LEFT_COLS.start, rows.start),
+                             (_LEFT_COLS.stop, rows.stop), c, 1)
+                c = (0,255,0) if right_buttons[i] else (0,0,255)
+                cv.rectangle(img_scale, (_RIGHT_COLS.start, rows.start),
+                             (_RIGHT_COLS.stop, rows.stop), c, 1)
 
         if self.log_photos:
-            cv.imwrite(photo_name_prefix + "5_markers.jpg", img_scale)
+            _log_photo(photo_name_prefix + "5_markers.jpg", img_scale)
         self.image_processed = img_scale
 
         self.left_buttons_idx = np.nonzero(left_buttons)[0].tolist()
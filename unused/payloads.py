@@ -1,14 +1,40 @@
+import functools
 import json
+from pathlib import Path
 from typing import Any
 
+# Resolve the payload directory once; resolve() stats every path component
+_PAYLOAD_DIR = (Path(__file__).parent / '../payloads').resolve()
+
 class Payloads():
 
     def __init__(self) -> None:
         # Get payloads from json files
-        with open('payloads/what_do.json', 'r') as f:
-            self.what_do_blocks : list[Any] = json.loads(f.read())['blocks']
+        with open(_PAYLOAD_DIR / 'what_do.json', 'r') as f:
+            blocks: list[Any] = json.loads(f.read())['blocks']
+        self.what_do_blocks = blocks
+        # The greeting text is the only per-call field; split it at the
+        # placeholder once and pre-serialize the static action blocks
+        header_text: str = blocks[0]['text']['text']
+        self._header_pre, _, self._header_post = header_text.partition('{name}')
+        self._action_blocks_json = json.dumps(blocks[1:])
 
     def get_what_do_blocks(self, name: str ='user') -> list[Any]:
-        these_blocks = self.what_do_blocks.copy()
-        these_blocks[0]['text']['text'] = these_blocks[0]['text']['text'].format(name=name)
-        return these_blocks
+        # Build the greeting section as a fresh literal instead of cloning a template
+        header = {
+            'type': 'section',
+            'text': {
+                'type': 'plain_text',
+                'text': self._header_pre + name + self._header_post,
+                'emoji': True,
+            },
+        }
+        blocks: list[Any] = [header]
+        blocks += json.loads(self._action_blocks_json)
+        return blocks
+
+
+@functools.lru_cache(maxsize=1)
+def get_payloads() -> Payloads:
+    """Shared instance; the json files are read and parsed once per process"""
+    return Payloads()